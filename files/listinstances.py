@@ -8,29 +8,35 @@ The implementation uses the OCI SDK and its pagination helper to
 ensure all results are retrieved.
 """
 
+from operator import attrgetter
 from typing import Dict, List, Optional
 
 import argparse
 import json
+import sys
 import oci
 
 
 VERSION = "listinstances.py version 17.12.2025"
 COPY_RIGHT = "(c) Inge Os 2025"
 
+# Summary keys and the instance attributes they are read from
+SUMMARY_KEYS = ("ocid", "name", "state")
+_summary_values = attrgetter("id", "display_name", "lifecycle_state")
 
-def get_compute_instances_summary(oci_config: Dict, compartment_id: str) -> List[Dict]:
-    """Return a list of simple summaries for compute instances.
+# Plain text output line: name, state, OCID
+TEXT_ROW = "Instance {} state: {} OCID: {}\n"
 
-    Each element in the returned list is a dict with keys: ``ocid``,
-    ``name`` and ``state``.
+
+def list_compute_instances(oci_config: Dict, compartment_id: str) -> List:
+    """Return the compute instance SDK models in a compartment.
 
     Args:
         oci_config: OCI configuration dict (from ``oci.config.from_file``).
         compartment_id: OCID of the compartment to query.
 
     Returns:
-        A list of dictionaries describing the instances. On error an
+        A list of ``oci.core.models.Instance`` objects. On error an
         empty list is returned.
     """
     try:
@@ -40,18 +46,7 @@ def get_compute_instances_summary(oci_config: Dict, compartment_id: str) -> List
         response = oci.pagination.list_call_get_all_results(
             compute_client.list_instances, compartment_id=compartment_id
         )
-
-        results = []
-        for instance in response.data:
-            results.append(
-                {
-                    "ocid": instance.id,
-                    "name": instance.display_name,
-                    "state": instance.lifecycle_state,
-                }
-            )
-
-        return results
+        return response.data
 
     except oci.exceptions.ServiceError as svc_err:
         print(f"OCI Service Error: {svc_err.code} - {svc_err.message}")
@@ -60,6 +55,26 @@ def get_compute_instances_summary(oci_config: Dict, compartment_id: str) -> List
         print(f"An unexpected error occurred: {exc}")
         return []
 
+
+def get_compute_instances_summary(oci_config: Dict, compartment_id: str) -> List[Dict]:
+    """Return a list of simple summaries for compute instances.
+
+    Each element in the returned list is a dict with keys: ``ocid``,
+    ``name`` and ``state``.
+
+    Args:
+        oci_config: OCI configuration dict (from ``oci.config.from_file``).
+        compartment_id: OCID of the compartment to query.
+
+    Returns:
+        A list of dictionaries describing the instances. On error an
+        empty list is returned.
+    """
+    return [
+        dict(zip(SUMMARY_KEYS, _summary_values(instance)))
+        for instance in list_compute_instances(oci_config, compartment_id)
+    ]
+
 def main():
     """Main entry point: parse args, load config and perform requested action."""
     # Print program header
@@ -100,8 +115,8 @@ def main():
             file_location=args.configfile, profile_name=args.profile
         )
 
-    # Fetch the list of instances
-    instances = get_compute_instances_summary(oci_config, args.compartment_id)
+    # Fetch the list of instances; output is built straight from the SDK models
+    instances = list_compute_instances(oci_config, args.compartment_id)
 
     if not instances:
         print(f"No instances found in compartment {args.compartment_id}")
@@ -109,23 +124,24 @@ def main():
 
     # Output as JSON array if requested
     if args.json:
-        out = []
-        for inst in instances:
-            out.append(
-                {
-                    "instance": inst["name"],
-                    "compartment_id": args.compartment_id,
-                    "instance_id": inst["ocid"],
-                    "profilename": args.profile,
-                }
-            )
+        out = [
+            {
+                "instance": inst.display_name,
+                "compartment_id": args.compartment_id,
+                "instance_id": inst.id,
+                "profilename": args.profile,
+            }
+            for inst in instances
+        ]
 
         print(json.dumps(out, indent=2))
         return 0
 
     # Plain text output
-    for inst in instances:
-        print(f"Instance {inst['name']} state: {inst['state']} OCID: {inst['ocid']}")
+    sys.stdout.write("".join(
+        TEXT_ROW.format(inst.display_name, inst.lifecycle_state, inst.id)
+        for inst in instances
+    ))
 
 
 
@@ -1,52 +1,81 @@
 import oci
 import argparse
+import functools
+from oci._vendor import requests   # the requests copy the OCI SDK clients are built on
+from collections import defaultdict
 
 #
 # Global values for recursion
 #
-maxRecursions = 10
+maxRecursions = 10     # Max number of compartments processed, 0 means no limit
 totalProcessed = 0
 identity_client = None
 listFunction = None
 OCI_Config = None
 compute_client = None
+plugin_client = None
+shared_session = None    # One HTTPS connection pool shared by all OCI clients
 emptyCompartment = True  # Dont print values for empty compartments
-missing_agents = []
+missing_agents = set()   # (compartment_id, instance_ocid) pairs
 
 
-def listResources( compartment_id, compartment_name, level):
-
-    global totalProcessed, maxRecursions, listFunction, identity_client, missing_agents
+@functools.lru_cache(maxsize=4096)
+def getCompartment(compartment_id):
+    # identity_client is created once in main(), so caching per OCID is safe
+    return identity_client.get_compartment(compartment_id).data
 
-    totalProcessed=totalProcessed+1
-
-
-    # Assume a valid identity client
-    # List child compartments with lifecycle_state == ACTIVE
-
-    # Process current compartment
-    compartment = identity_client.get_compartment(compartment_id).data
-    if listFunction is not None:
-        listFunction(compartment)
-    else:
-        if compartment_name is None:
-            compartment_name = "Root"
-        print(f"Parent compartment: {compartment_name} Name: {compartment.name}, OCID: {compartment.id} ")
 
+def listSubtreeCompartments():
+    # One paginated call returns every compartment in the tenancy;
+    # index them by parent so the tree can be walked locally
     compartments = oci.pagination.list_call_get_all_results(
         identity_client.list_compartments,
-        compartment_id=compartment_id,
-        compartment_id_in_subtree=False,
+        compartment_id=OCI_Config['tenancy'],
+        compartment_id_in_subtree=True,
         access_level="ANY"
     ).data
-    if compartments is not None:
-        for compartment in compartments:
-            if compartment.lifecycle_state == "ACTIVE":
-                # print("  " * level + f"Name: {compartment.name}, OCID: {compartment.id}")
-                # Recursively visit subcompartment if limit is not hit
-                if maxRecursions == 0 or totalProcessed < maxRecursions:
-                    listResources(compartment.id, compartment.name,level + 1)
-    #
+    children = defaultdict(list)
+    for compartment in compartments or []:
+        children[compartment.compartment_id].append(compartment)
+    return children
+
+
+def listResources( compartment_id, compartment_name, level):
+
+    global totalProcessed, maxRecursions, listFunction, identity_client, missing_agents
+
+    # Assume a valid identity client
+    # compartment_id_in_subtree is only accepted on the tenancy, so the whole
+    # tenancy is listed once and the subtree below compartment_id is walked locally
+    children = listSubtreeCompartments()
+
+    # Walk the tree level by level
+    pending = [(getCompartment(compartment_id), compartment_name)]
+    while pending:
+        if maxRecursions > 0:
+            pending = pending[:maxRecursions - totalProcessed]
+
+        # Process the compartments of the current level
+        for compartment, compartment_name in pending:
+            totalProcessed=totalProcessed+1
+            if listFunction is not None:
+                listFunction(compartment)
+            else:
+                if compartment_name is None:
+                    compartment_name = "Root"
+                print(f"Parent compartment: {compartment_name} Name: {compartment.name}, OCID: {compartment.id} ")
+
+        if maxRecursions > 0 and totalProcessed >= maxRecursions:
+            break
+
+        # Child compartments with lifecycle_state == ACTIVE make up the next level
+        pending = [
+            (child, child.name)
+            for compartment, _ in pending
+            for child in children.get(compartment.id, [])
+            if child.lifecycle_state == "ACTIVE"
+        ]
+        level = level + 1
 
 
 def listCompute(compartment,listAgents=False):
@@ -57,24 +86,29 @@ def listCompute(compartment,listAgents=False):
     resources = []
     if compute_client is None:
         compute_client = oci.core.ComputeClient(OCI_Config)
+        compute_client.base_client.session = shared_session
     # List all instances in the compartment
     #instances = compute_client.list_instances(compartment_id=compartment.id).data
-    instances = oci.pagination.list_call_get_all_results(
+    # Instances are yielded page by page instead of materializing the full list first
+    instances = oci.pagination.list_call_get_all_results_generator(
         compute_client.list_instances,
+        'record',
         compartment_id=compartment.id
-    ).data
-
-    if not instances and not emptyCompartment:
-        print(f"No compute instances found in compartment {compartment.id}")
-        return None
+    )
 
+    instance_found = False
     for instance in instances:
+        instance_found = True
         #print(f"Compartment: {compartment.id} Instance: {instance.display_name} OCID: {instance.id} Lifecycle State: {instance.lifecycle_state}")
         print(f"Compartment: {compartment.name} Instance OCID: {instance.id} Lifecycle State: {instance.lifecycle_state} Instance name: {instance.display_name}")
         if instance.lifecycle_state == 'RUNNING':
             #listAgentStates(instance.id, compartment.id)
             if listAgents:
-                list_oci_agent_status(instance.id)
+                list_oci_agent_status(instance.id, compartment.id, plugin_client)
+
+    if not instance_found and not emptyCompartment:
+        print(f"No compute instances found in compartment {compartment.id}")
+        return None
 
 
 def listComputeWithAgents(compartment):
@@ -96,7 +130,7 @@ def listAgentStates_NLU( instance_ocid,compartment_id):
         for plugin in response.data:
             print(f"- Plugin Name: {plugin.name}, Status: {plugin.status}")
             if plugin.name == 'Vulnerability Scanning' and plugin.status != 'RUNNING':
-                missing_agents.append({compartment_id, instance_ocid})
+                missing_agents.add((compartment_id, instance_ocid))
 
     except Exception as e:
         print("No agent plugins are confgured", e)
@@ -107,20 +141,19 @@ def listPolicies(compartment):
    
     compartment_id = compartment.id
 
-    # Fetch all policies in the compartment
-    policies = oci.pagination.list_call_get_all_results(
+    # Fetch all policies in the compartment, page by page
+    policies = oci.pagination.list_call_get_all_results_generator(
         identity_client.list_policies,
+        'record',
         compartment_id=compartment_id
-    ).data
-
-    if len(policies) > 0:
+    )
 
-        for policy in policies:
-            print(f"Compartment: {compartment.name} {compartment_id} Policy Name: {policy.name}", end=' ')
-            print(f"Description: {policy.description}")
-            if len(policy.statements) > 0:
-                for stmt in policy.statements:
-                    print(f"  - {stmt}")
+    for policy in policies:
+        print(f"Compartment: {compartment.name} {compartment_id} Policy Name: {policy.name}", end=' ')
+        print(f"Description: {policy.description}")
+        if len(policy.statements) > 0:
+            for stmt in policy.statements:
+                print(f"  - {stmt}")
 
 
 def listBlockStorageInfo(unatttached=False):
@@ -153,6 +186,13 @@ def listSubscribedRegions(root_compartment_id):
     except Exception as e:
         print(f"Error listing regions: {e}")
 
+def getSharedSession(pool_size=32):
+    # Keep the SDK's own HTTPS adapter (if this SDK version has one), only with a larger pool
+    adapter_class = getattr(oci.base_client, 'OCIHTTPAdapter', requests.adapters.HTTPAdapter)
+    session = requests.Session()
+    session.mount('https://', adapter_class(pool_connections=pool_size, pool_maxsize=pool_size))
+    return session
+
 def getConfig(configFile=None, profile="Default"):
     if configFile is None:
         config = oci.config.from_file(profile_name=profile)
@@ -160,34 +200,21 @@ def getConfig(configFile=None, profile="Default"):
         config = oci.config.from_file(file_location=configFile, profile_name=profile)
     return config
 
-def list_oci_agent_status(instance_ocid):
+def list_oci_agent_status(instance_ocid, compartment_id, plugin_client):
     """
     Lists the status of all OCI agents (plugins) on a specified compute instance.
 
     Args:
         instance_ocid (str): The OCID of the compute instance.
+        compartment_id (str): The OCID of the compartment holding the instance.
+        plugin_client (PluginClient): Shared client for the OCI agent plugins.
 
     Returns:
         dict: A dictionary where keys are agent names and values are their statuses,
               or None if the instance is not found or an error occurs.
     """
     try:
-  
-        # Initialize the ComputeClient to get the instance details (specifically, its compartment_id)
-        compute_client = oci.core.ComputeClient(OCI_Config)
-
-        # Get the instance details to retrieve the compartment ID
-        try:
-            get_instance_response = compute_client.get_instance(instance_id=instance_ocid)
-        except:
-            print(f"Fetch of instance with ocid: {instance_ocid} failed")
-            return 1
-        instance_data = get_instance_response.data
-        compartment_id = instance_data.compartment_id
 
-        # Initialize the PluginClient to interact with the OCI agents
-        plugin_client = oci.compute_instance_agent.PluginClient(OCI_Config)
-        
         # Get the list of plugins for the instance
         list_plugins_response = plugin_client.list_instance_agent_plugins(
             instanceagent_id=instance_ocid,
@@ -227,7 +254,7 @@ def list_oci_agent_status(instance_ocid):
 def main():
 
     #
-    global listFunction, identity_client, OCI_Config
+    global listFunction, identity_client, plugin_client, shared_session, OCI_Config
 
     resources='Resource  compartments|compute|compute-agents|compute-scan|block|unattached|policy'
     parser = argparse.ArgumentParser(description="´resource extracter")
@@ -283,8 +310,14 @@ def main():
     # 
     # Setup global values for recursion
 
-    # Create identity client
+    # Create identity client, all clients reuse the same connections
+    shared_session = getSharedSession()
     identity_client = oci.identity.IdentityClient(OCI_Config)
+    identity_client.base_client.session = shared_session
+    # One PluginClient for all agent status lookups
+    if args.resource == 'compute-agents':
+        plugin_client = oci.compute_instance_agent.PluginClient(OCI_Config)
+        plugin_client.base_client.session = shared_session
 
     # Iterate over all compartments
     listResources(compartment_id, None, level=0)
@@ -294,7 +327,7 @@ def main():
 
         if len(missing_agents) > 0:
             print('Compute resourcues without running vulnerability agent')
-            print(missing_agents)
+            print(sorted(missing_agents))
         else:
             print('All running instances runs vulnerability agent')
              
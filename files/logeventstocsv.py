@@ -1,7 +1,9 @@
-import pandas as pd
-import json
+import csv
 import sys
 
+import ijson
+import orjson
+
 if len(sys.argv) != 3:
     print("Usage: python extract_audit.py <inputfile.json> <outputfile.csv>")
     sys.exit(1)
@@ -9,14 +11,59 @@ if len(sys.argv) != 3:
 inputfile = sys.argv[1]
 outputfile = sys.argv[2]
 
-with open(inputfile, 'r') as f:
-    data = json.load(f)
 
-# Adjust this if your JSON structure is different
-events = data['data'] if 'data' in data else data
+def events_layout(path):
+    """Return (ijson prefix, multiple_values) for a top-level array, a 'data' array or JSON lines."""
+    with open(path, 'rb') as f:
+        # Only the start of the first top-level value has to be parsed to tell them apart
+        for prefix, event, _ in ijson.parse(f, multiple_values=True):
+            if prefix == '':
+                if event == 'start_array':
+                    return 'item', False
+                if event == 'end_map':
+                    return '', True
+            elif prefix == 'data':
+                if event == 'start_array':
+                    return 'data.item', False
+                return '', True
+    return 'item', False
 
-df = pd.json_normalize(events)
-df.to_csv(outputfile, index=False)
 
-print(f"Extracted data from {inputfile} and saved as {outputfile}.")
+def stream_events(path, layout):
+    """Yield one event at a time from the input file without loading it into memory."""
+    prefix, multiple_values = layout
+    with open(path, 'rb') as f:
+        yield from ijson.items(f, prefix, multiple_values=multiple_values, use_float=True)
+
+
+def flatten(d, prefix=''):
+    """Flatten nested dicts into dotted keys, same as pandas.json_normalize (sep='.').
+
+    Lists and empty objects are kept in one cell as a JSON string.
+    """
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict) and v:
+            yield from flatten(v, f"{key}.")
+        elif isinstance(v, (dict, list)):
+            yield key, orjson.dumps(v).decode()
+        else:
+            yield key, v
 
+
+layout = events_layout(inputfile)
+
+# First pass: collect the union of keys, in first-seen order like json_normalize
+headers = {}
+for event in stream_events(inputfile, layout):
+    for key, _ in flatten(event):
+        headers.setdefault(key, None)
+
+# Second pass: write one row per event
+with open(outputfile, 'w', newline='') as out:
+    writer = csv.DictWriter(out, fieldnames=list(headers))
+    writer.writeheader()
+    for event in stream_events(inputfile, layout):
+        writer.writerow(dict(flatten(event)))
+
+print(f"Extracted data from {inputfile} and saved as {outputfile}.")
@@ -1,62 +1,219 @@
 import argparse
 import datetime
+import functools
+import gzip
 import json
+import os
 import sys
 import pickle
+import queue
 import time
 import re
-from typing import List, Tuple, Generator, Dict, Any, Optional
-
-# Attempt to import OCI SDK modules
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Generator, Dict, Any, Optional
+
+# OCI SDK modules, imported by _import_oci() when the first client is created so that
+# --help and argument errors do not pay for the (slow) SDK import
+oci = None
+AuditClient = None
+from_file = None
+list_call_get_all_results_generator = None
+ServiceError = None
+requests = None
+
+
+def _import_oci():
+    """Imports the OCI SDK modules into the module globals, exiting if the SDK is missing."""
+    global oci, AuditClient, from_file, list_call_get_all_results_generator, ServiceError, requests
+    if oci is not None:
+        return
+    try:
+        import oci
+        from oci.audit.audit_client import AuditClient
+        from oci.config import from_file
+        from oci.pagination import list_call_get_all_results_generator
+        from oci.exceptions import ServiceError
+        from oci._vendor import requests  # the requests copy the OCI SDK clients are built on
+    except ImportError:
+        print("Error: OCI SDK is not installed. Please install it using 'pip install oci'")
+        sys.exit(1)
+
+# orjson is optional; without it events are serialized with one reused OciCustomEncoder
 try:
-    import oci
-    from oci.audit.audit_client import AuditClient
-    from oci.config import from_file
-    from oci.pagination import list_call_get_all_results
-    from oci.exceptions import ServiceError
-    from oci.util import to_dict
+    import orjson
 except ImportError:
-    print("Error: OCI SDK is not installed. Please install it using 'pip install oci'")
-    sys.exit(1)
+    orjson = None
 
 
 # Global string keys used when indexing dictionaries returned by the OCI SDK
 TENANCY = "tenancy"
-KEY_DATA = "data"
-KEY_EVENT_TYPE = "event_type"
-KEY_EVENT_NAME = "event_name"
+
+# Default event name frequency file, rewritten every EVENT_COUNT_CHECKPOINT events so a crash keeps the counts so far
+ALL_EVENTS_FILE = "allevents.json"
+EVENT_COUNT_CHECKPOINT = 100_000
+
+# Connection level retries (connect errors, dropped keep-alive connections) of the shared HTTPS session;
+# API errors are still retried by the OCI SDK itself
+HTTP_MAX_RETRIES = 3
+
+# Events buffered between the chunk worker threads and the file writer; workers wait while it is full
+EVENT_QUEUE_SIZE = 1024
+# Queued by a worker after the last event of its chunk
+_CHUNK_DONE = object()
+
+# Output file buffer size, and number of serialized events collected before one writelines() call
+WRITE_BUFFER_SIZE = 1 << 20
+WRITE_BATCH_EVENTS = 1000
+# Pre-encoded separators, the output file is written in binary mode
+ARRAY_OPEN = b'[\n'
+ARRAY_SEP = b',\n'
+LINE_END = b'\n'
+ARRAY_CLOSE = b']\n'
 
 
 # --- Custom JSON Encoder for OCI SDK Objects and datetime ---
 
+def _iso(dt: datetime.datetime) -> str:
+    """
+    Formats a datetime as an RFC3339 (ISO 8601) string, naive datetimes as UTC.
+    Cached because related audit events repeat the same timestamps.
+    """
+    # Aware datetimes of the same instant compare equal whatever their offset,
+    # so the offset is part of the cache key
+    return _iso_cached(dt, dt.utcoffset())
+
+
+@functools.lru_cache(maxsize=8192)
+def _iso_cached(dt: datetime.datetime, offset: Optional[datetime.timedelta]) -> str:
+    """Formats dt for _iso; offset only keys the cache."""
+    return dt.isoformat() if dt.tzinfo else dt.isoformat() + '+00:00'
+
+
 class OciCustomEncoder(json.JSONEncoder):
     """
     A custom JSON Encoder that handles OCI SDK objects (by converting them to dicts) 
     and datetime objects (by formatting them to ISO 8601 strings).
+    Produces the same JSON as the orjson path, so output does not depend on orjson being installed.
     """
     def default(self, obj):
         if isinstance(obj, datetime.datetime):
             # Format datetime objects as RFC3339 (ISO 8601) strings, 
             # which is the standard used by OCI.
-            return obj.isoformat() + 'Z'
-        
-        # OCI SDK objects often have a to_dict() method for serialization.
+            return _iso(obj)
+
+        # OCI SDK models: read the swagger fields directly
+        if hasattr(obj, 'swagger_types'):
+            return _oci_default(obj)
+
+        # Other OCI SDK objects often have a to_dict() method for serialization.
         if hasattr(obj, 'to_dict'):
             return obj.to_dict()
         
         return super().default(obj)
 
 
+def _make_event_serializer(indent: bool):
+    """
+    Returns a function that serializes one audit event to UTF-8 JSON bytes: indented by 2,
+    or compact and terminated by a newline, ready to be written as one NDJSON line.
+    Uses orjson when installed, called directly through functools.partial, otherwise a
+    single OciCustomEncoder that is created once and reused for every event instead of a
+    new encoder per json.dumps call.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NAIVE_UTC | (orjson.OPT_INDENT_2 if indent else orjson.OPT_APPEND_NEWLINE)
+        return functools.partial(orjson.dumps, default=_oci_default, option=option)
+
+    if indent:
+        encoder = OciCustomEncoder(indent=2, ensure_ascii=False)
+        return lambda item: encoder.encode(item).encode('utf-8')
+    encoder = OciCustomEncoder(separators=(',', ':'), ensure_ascii=False)
+    return lambda item: (encoder.encode(item) + '\n').encode('utf-8')
+
+
+def _make_shared_session(pool_size: int) -> "requests.Session":
+    """
+    Creates a requests.Session that several OCI clients can share, so connections
+    and TLS sessions are reused. Keeps the SDK's own HTTPS adapter when available.
+    The pool holds pool_size keep-alive connections, one per worker thread.
+    """
+    adapter_class = getattr(oci.base_client, 'OCIHTTPAdapter', requests.adapters.HTTPAdapter)
+    session = requests.Session()
+    session.mount('https://', adapter_class(pool_connections=pool_size, pool_maxsize=pool_size,
+                                            max_retries=HTTP_MAX_RETRIES))
+    return session
+
+
+# Kinds of swagger fields that _oci_default converts itself instead of leaving them to the encoder
+_FIELD_PLAIN, _FIELD_DATETIME, _FIELD_MODEL = 0, 1, 2
+_PLAIN_SWAGGER_TYPES = frozenset(('str', 'int', 'float', 'bool', 'object', 'date'))
+
+# Per model class: (json name, attribute name, field kind) of each swagger field, computed once per class
+_MODEL_FIELDS: Dict[type, Tuple[Tuple[str, str, int], ...]] = {}
+
+
+def _field_kind(swagger_type: str) -> int:
+    """Classifies a swagger type name as a datetime, a nested model or anything else."""
+    if swagger_type == 'datetime':
+        return _FIELD_DATETIME
+    if swagger_type in _PLAIN_SWAGGER_TYPES or swagger_type.startswith(('list[', 'dict(')):
+        return _FIELD_PLAIN
+    return _FIELD_MODEL
+
+
+def _model_fields(obj) -> Tuple[Tuple[str, str, int], ...]:
+    """
+    Returns the cached swagger field list of an OCI model's class. swagger_types is set
+    per instance by the SDK, so the first instance seen of each class fills the cache.
+    """
+    fields = _MODEL_FIELDS.get(type(obj))
+    if fields is None:
+        fields = tuple((name, '_' + name, _field_kind(swagger_type))
+                       for name, swagger_type in obj.swagger_types.items())
+        _MODEL_FIELDS[type(obj)] = fields
+    return fields
+
+
+def _oci_default(obj):
+    """
+    orjson fallback for OCI SDK objects. Models keep each swagger field in a '_<name>'
+    attribute, so the JSON dict is read straight from vars() without the to_dict() walk.
+    Datetime fields are formatted and nested models converted here, using the cached
+    field kinds, so the encoder does not call back for them; lists and dicts of models
+    still come back through this hook.
+    """
+    if hasattr(obj, 'swagger_types'):
+        attrs = vars(obj)
+        result = {}
+        for name, attr, kind in _model_fields(obj):
+            if attr not in attrs:
+                continue
+            value = attrs[attr]
+            if kind == _FIELD_DATETIME and isinstance(value, datetime.datetime):
+                value = _iso(value)
+            elif kind == _FIELD_MODEL and hasattr(value, 'swagger_types'):
+                value = _oci_default(value)
+            result[name] = value
+        return result
+    return str(obj)
+
+
 # --- Core Logic Class ---
 
 class OciAuditStreamer:
     """Handles OCI configuration, date chunking, and streaming of audit events."""
     
     # OCI Audit API has a practical time range limit of 14 days per request.
-    MAX_CHUNK_DAYS = 7
+    # A window the service still rejects as too large is split in half and retried, see _list_events.
+    MAX_CHUNK_DAYS = 14
+    # Default number of date chunks fetched concurrently; each chunk is an independent, network-bound API call.
+    MAX_WORKERS = 8
     
     def __init__(self,  profile_name: str, 
-                 start_date: str, end_date: str, oci_config_path: Optional[str] = None):
+                 start_date: str, end_date: str, oci_config_path: Optional[str] = None,
+                 parallelism: int = MAX_WORKERS):
         """
         Initializes the streamer with configuration and date parameters.
         
@@ -64,18 +221,25 @@ class OciAuditStreamer:
         :param start_date: The start date in DD.MM.YY format.
         :param end_date: The end date in DD.MM.YY format.
         :param oci_config_path: Optional path to the OCI config file.
+        :param parallelism: Number of date chunks fetched concurrently.
         """
 
         self.profile_name = profile_name
         self.oci_config_path = oci_config_path
         self.oci_config = None
+        self.parallelism = max(1, parallelism)
+        self._thread_local = threading.local()
         
         # Convert date strings to datetime objects
         self.start_dt = self._parse_date(start_date)
-        self.end_dt = self._parse_date(end_date) + datetime.timedelta(days=1) - datetime.timedelta(seconds=1)
+        # end_dt is exclusive: midnight after the end date, as list_events does not include end_time
+        self.end_dt = self._parse_date(end_date) + datetime.timedelta(days=1)
+        if self.end_dt <= self.start_dt:
+            print(f"Error: End date '{end_date}' is before start date '{start_date}'.")
+            sys.exit(1)
 
-        # Initialize OCI Client
-        self.audit_client = self._initialize_client()
+        # Initialize OCI config, the shared session and the AuditClient of this thread
+        self._initialize_client()
         self.compartment_ocid = self.oci_config[TENANCY]
 
     def _parse_date(self, date_str: str) -> datetime.datetime:
@@ -89,139 +253,262 @@ class OciAuditStreamer:
             print(f"Error: Date '{date_str}' is not in the required DD.MM.YY format.")
             sys.exit(1)
 
-    def _initialize_client(self) -> AuditClient:
-        """Loads OCI configuration and initializes the AuditClient."""
+    def _initialize_client(self):
+        """
+        Imports the OCI SDK, loads OCI configuration and creates the shared session and the
+        AuditClient of the calling thread, which is reused when it fetches chunks itself.
+        """
+        _import_oci()
         try:
             # Load OCI configuration from the specified path or default location
             if self.oci_config_path:
                 self.oci_config = from_file(file_location=self.oci_config_path, profile_name=self.profile_name)
             else:
                 self.oci_config = from_file(profile_name=self.profile_name)
-            
-            return AuditClient(self.oci_config)
+
+            # One connection pool shared by the AuditClient of every worker thread
+            self._session = _make_shared_session(self.parallelism)
+            # Creating the client validates the config before any chunk is fetched
+            self._get_thread_client()
         except Exception as e:
             print(f"Error initializing OCI client with profile '{self.profile_name}': {e}")
             sys.exit(1)
 
-    def _get_date_chunks(self) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    def _chunk_count(self) -> int:
+        """Returns the number of MAX_CHUNK_DAYS chunks needed to cover the date range."""
+        total_days = (self.end_dt - self.start_dt).days
+        return max(0, -(-total_days // self.MAX_CHUNK_DAYS))
+
+    def _get_date_chunks(self) -> Generator[Tuple[datetime.datetime, datetime.datetime], None, None]:
         """
-        Splits the total date range into chunks of MAX_CHUNK_DAYS (14 days) or less.
+        Yields the total date range split into chunks of MAX_CHUNK_DAYS (14 days) or less.
+        Chunks are half-open [start, end): each ends where the next one starts, and the last
+        chunk ends at end_dt. All boundaries fall on midnight, as the API requires whole minutes.
         """
-        chunks = []
-        current_start = self.start_dt
         max_duration = datetime.timedelta(days=self.MAX_CHUNK_DAYS)
 
-        while current_start <= self.end_dt:
-            # Calculate chunk end time (14 days from current_start, minus 1 second to stay within the range)
-            chunk_end = min(current_start + max_duration, self.end_dt)
+        for i in range(self._chunk_count()):
+            chunk_start = self.start_dt + i * max_duration
+            chunk_end = min(chunk_start + max_duration, self.end_dt)
+            yield chunk_start, chunk_end
+
+    def _get_thread_client(self) -> "AuditClient":
+        """Returns the AuditClient of the calling worker thread, creating it on first use."""
+        client = getattr(self._thread_local, 'audit_client', None)
+        if client is None:
+            client = AuditClient(self.oci_config)
+            client.base_client.session = self._session
+            self._thread_local.audit_client = client
+        return client
+
+    def _list_events(self, window_start: datetime.datetime,
+                     window_end: datetime.datetime) -> Generator[Any, None, None]:
+        """
+        Yields the audit events of one time window as the pages arrive. If the service rejects
+        the window (HTTP 400, e.g. range too large) it is bisected and both halves are fetched.
+        """
+        yielded = False
+        try:
+            # OCI SDK pagination generator: one page in memory at a time
+            for event in list_call_get_all_results_generator(
+                self._get_thread_client().list_events,
+                'record',
+                compartment_id=self.compartment_ocid,
+                start_time=window_start,
+                end_time=window_end
+            ):
+                yielded = True
+                yield event
+        except ServiceError as e:
+            if yielded or e.status != 400 or window_end - window_start <= datetime.timedelta(days=1):
+                raise
+            # Split on a whole day so both halves stay minute-aligned; [start, middle) and
+            # [middle, end) meet exactly, as end_time is exclusive
+            middle = window_start + datetime.timedelta(days=(window_end - window_start).days // 2)
+            print(f"Time range {window_start} to {window_end} rejected ({e.code}), retrying in two halves")
+            yield from self._list_events(window_start, middle)
+            yield from self._list_events(middle, window_end)
+
+    def _stream_chunk(self, chunk_no: int, total_chunks: int,
+                      chunk_start: datetime.datetime, chunk_end: datetime.datetime) -> Generator[Any, None, None]:
+        """
+        Yields the audit events of a single date chunk.
+        Errors are reported and end the chunk so the other chunks continue.
+        """
+        # chunk_end is exclusive, the last day of the chunk is the one before it
+        last_day = (chunk_end - datetime.timedelta(days=1)).date()
+        print(f"\n--- Processing Chunk {chunk_no}/{total_chunks}: {chunk_start.date()} to {last_day} ---")
+
+        chunk_events = 0
+        try:
+            for event in self._list_events(chunk_start, chunk_end):
+                chunk_events += 1
+                yield event
+            print(f"Chunk {chunk_no} completed. Events retrieved in this chunk: {chunk_events}")
 
-            if chunk_end < current_start:
-                # Should not happen if logic is correct, but safe guard.
-                break
+        except ServiceError as e:
+            print(f"OCI Service Error in Chunk {chunk_no} ({chunk_start.date()} to {last_day}): {e}")
+        except Exception as e:
+            print(f"An unexpected error occurred in Chunk {chunk_no}: {e}")
 
-            chunks.append((current_start, chunk_end))
-            
-            # Set the next start time to one second after the current chunk_end
-            current_start = chunk_end + datetime.timedelta(seconds=1)
-        
-        return chunks
+    def _put(self, events: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+        """
+        Puts item on the bounded event queue, waiting while it is full.
+        Returns False without queuing if the consumer has stopped.
+        """
+        while not stop.is_set():
+            try:
+                events.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce_chunk(self, events: "queue.Queue", stop: threading.Event, chunk_no: int, total_chunks: int,
+                       chunk_start: datetime.datetime, chunk_end: datetime.datetime):
+        """
+        Pushes the audit events of a single date chunk onto the event queue as the pages
+        arrive, followed by _CHUNK_DONE. Runs in a worker thread.
+        """
+        try:
+            if stop.is_set():
+                return
+            for event in self._stream_chunk(chunk_no, total_chunks, chunk_start, chunk_end):
+                if not self._put(events, event, stop):
+                    return
+        finally:
+            self._put(events, _CHUNK_DONE, stop)
 
     def fetch_events_generator(self) -> Generator[Dict[str, Any], None, None]:
         """
-        Iterates through date chunks and yields audit events one by one using a generator.
+        Yields audit events one by one using a generator.
+        With parallelism 1 the chunks are read sequentially and events stream page by page;
+        otherwise the chunks are fetched concurrently by worker threads that feed a bounded
+        queue (EVENT_QUEUE_SIZE events), so events are yielded as they arrive. Events within
+        a chunk keep their order, events of different chunks are interleaved.
         """
         date_chunks = self._get_date_chunks()
-        total_chunks = len(date_chunks)
+        total_chunks = self._chunk_count()
         event_count = 0
 
-        print(f"Total time range: {self.start_dt.date()} to {self.end_dt.date()}")
-        print(f"Fetching in {total_chunks} chunks of max {self.MAX_CHUNK_DAYS} days...")
+        print(f"Total time range: {self.start_dt.date()} to {(self.end_dt - datetime.timedelta(days=1)).date()}")
+        print(f"Fetching in {total_chunks} chunks of max {self.MAX_CHUNK_DAYS} days using {self.parallelism} workers...")
 
-        for i, (chunk_start, chunk_end) in enumerate(date_chunks):
-            print(f"\n--- Processing Chunk {i+1}/{total_chunks}: {chunk_start.date()} to {chunk_end.date()} ---")
-            
-            try:
-                # OCI SDK utility function for automatic pagination handling
-                list_events_response = list_call_get_all_results(
-                    self.audit_client.list_events,
-                    compartment_id=self.compartment_ocid,
-                    start_time=chunk_start,
-                    end_time=chunk_end
-                )
-
-                for event in list_events_response.data:
-                #for event in jpayload:
+        if self.parallelism == 1:
+            for i, (chunk_start, chunk_end) in enumerate(date_chunks):
+                for event in self._stream_chunk(i + 1, total_chunks, chunk_start, chunk_end):
                     yield event
                     event_count += 1
-                
-                print(f"Chunk {i+1} completed. Events retrieved in this chunk: {len(list_events_response.data)}")
-
-            except ServiceError as e:
-                print(f"OCI Service Error in Chunk {i+1} ({chunk_start.date()} to {chunk_end.date()}): {e}")
-                # Continue to the next chunk if one fails, or raise the error if fatal
-                continue
-            except Exception as e:
-                print(f"An unexpected error occurred in Chunk {i+1}: {e}")
-                continue
+        else:
+            events = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+            # Set when the consumer goes away early, so blocked workers give up instead of hanging
+            stop = threading.Event()
+            with ThreadPoolExecutor(max_workers=self.parallelism) as pool:
+                try:
+                    # One _CHUNK_DONE arrives for every chunk actually submitted
+                    pending = 0
+                    for i, (chunk_start, chunk_end) in enumerate(date_chunks):
+                        pool.submit(self._produce_chunk, events, stop, i + 1, total_chunks, chunk_start, chunk_end)
+                        pending += 1
+                    while pending > 0:
+                        event = events.get()
+                        if event is _CHUNK_DONE:
+                            pending -= 1
+                            continue
+                        yield event
+                        event_count += 1
+                finally:
+                    stop.set()
 
         print(f"\nAudit log fetch complete. Total events yielded: {event_count}")
 
-# --- Utility Function for Streaming to File ---
+# --- Utility Functions for Streaming to File ---
 
-def stream_to_json_file(data_generator: Generator, output_file_path: str, eventfilter :str):
+def _write_event_counts(all_events: Counter, path: str):
+    """
+    Writes the event name counters to path atomically, via a temp file that is renamed over it.
     """
-    Writes the data stream (generator) to a file as a single, valid JSON array.
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as ff:
+        if orjson is not None:
+            # OPT_NON_STR_KEYS: events without a name are counted under None, written as "null"
+            ff.write(orjson.dumps(dict(all_events), option=orjson.OPT_NON_STR_KEYS))
+        else:
+            ff.write(json.dumps(all_events).encode('utf-8'))
+    os.replace(tmp_path, path)
+
+
+def stream_to_json_file(data_generator: Generator, output_file_path: str, eventfilter :str, json_array: bool = False,
+                        events_file: str = ALL_EVENTS_FILE):
+    """
+    Writes the data stream (generator) to a file as newline-delimited JSON (one compact
+    event per line), or as a single, valid indented JSON array when json_array is set.
+    Output paths ending in .gz are gzip compressed. Event name counts are written to events_file.
     """
     print(f"Writing results to file: {output_file_path}...")
     
+    # Compile all filters once into a single alternation instead of re-parsing them per event
+    compiled = None
     if eventfilter is not None:
-        filters=eventfilter.split(';')
+        compiled = re.compile('|'.join(f'(?:{single_filter})' for single_filter in eventfilter.split(';')))
+    serialize = _make_event_serializer(indent=json_array)
     try:
-        all_events={}
-        with open(output_file_path, 'w', encoding='utf-8') as f:
+        all_events=Counter()
+        # Binary mode: orjson emits UTF-8 bytes, so no text encoding step per write
+        if output_file_path.endswith('.gz'):
+            out = gzip.open(output_file_path, 'wb', compresslevel=3)
+        else:
+            out = open(output_file_path, 'wb', buffering=WRITE_BUFFER_SIZE)
+        with out as f:
+            buf = []
+            batched = 0
             # 1. Write the opening bracket for the JSON array
-            f.write('[\n')
+            if json_array:
+                f.write(ARRAY_OPEN)
    
             is_first = True
-            for item in data_generator:
-                # 2. Add comma separator before all items except the first
-                if not is_first:
-                    f.write(',\n')
-                
-                # 3. Serialize the item (handles OCI objects and datetimes via custom encoder)
-                jitem=to_dict(item)
+            for event_no, item in enumerate(data_generator, 1):
+                # 2. Read the filter and counter fields straight from the SDK model
+                event_type = item.event_type
+                event_name = item.data.event_name
                 #
-                # only serialize events of interest using regexp
+                # Collect all event types (One time job
                 #
-                if eventfilter is None:
-                    f.write(json.dumps(jitem, indent=2))
-                    is_first = False
-                else:
-                    for single_filter in filters:
-                        in_filter=re.search(single_filter, jitem[KEY_DATA][KEY_EVENT_TYPE])
-                        if in_filter:
-                            f.write(json.dumps(jitem, indent=2))
-                            is_first = False
-                            break
+                all_events[event_name] += 1
+                if event_no % EVENT_COUNT_CHECKPOINT == 0:
+                    _write_event_counts(all_events, events_file)
                 #
-                # Collect all event types (One time job
+                # only serialize events of interest using regexp
                 #
-                event_value=jitem[KEY_DATA][KEY_EVENT_NAME]
-                if event_value in all_events:
-                    all_events[event_value]+=1
+                if compiled is not None and not compiled.search(event_type):
+                    continue
+                # 3. Serialize the SDK model directly; naive datetimes are written as UTC like to_dict() did
+                # 4. One event per line (the serializer adds the newline), or comma separated array items
+                if json_array:
+                    if not is_first:
+                        buf.append(ARRAY_SEP)
+                    buf.append(serialize(item))
                 else:
-                    all_events[event_value]=0
-            # If data was written, ensure the last object is followed by a newline before closing.
-            if not is_first:
-                 f.write('\n')
-            
-            # 4. Write the closing bracket
-            f.write(']\n')
+                    buf.append(serialize(item))
+                is_first = False
+                batched += 1
+                if batched == WRITE_BATCH_EVENTS:
+                    f.writelines(buf)
+                    buf.clear()
+                    batched = 0
+
+            f.writelines(buf)
+
+            if json_array:
+                # If data was written, ensure the last object is followed by a newline before closing.
+                if not is_first:
+                     f.write(LINE_END)
+
+                # 5. Write the closing bracket
+                f.write(ARRAY_CLOSE)
 
         print(f"Successfully streamed audit logs to {output_file_path}")
-        ff=open('allevents.json','w')
-        ff.write(json.dumps(all_events))
-        ff.close()
+        _write_event_counts(all_events, events_file)
     except IOError as e:
         print(f"Error writing to file {output_file_path}: {e}")
     except Exception as e:
@@ -232,20 +519,28 @@ def stream_to_json_file(data_generator: Generator, output_file_path: str, eventf
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Fetch OCI Audit Events for a specified time range, splitting the request into 14-day chunks, and streaming the output to a valid JSON file."
+        description="Fetch OCI Audit Events for a specified time range, splitting the request into 14-day chunks, and streaming the output to a newline-delimited JSON file (or a JSON array with --format json)."
     )
     
     # Required arguments
     parser.add_argument('--startdate', required=True, help="Start date in DD.MM.YY format (e.g., 01.12.2025).")
     parser.add_argument('--enddate', required=True, help="End date in DD.MM.YY format (e.g., 01.12.2025). The query fetches up to the end of this day.")
     parser.add_argument('--profilename', required=True, help="The profile name in your OCI configuration file (e.g., DEFAULT).")
-    parser.add_argument('--outputfile', required=True, help="The path and filename for the output JSON file (e.g., audit_logs.json).")
+    parser.add_argument('--outputfile', required=True, help="The path and filename for the output file (e.g., audit_logs.jsonl). A .gz suffix writes gzip compressed output.")
     # Using 'eventfilter' for the required Compartment OCID, as explained in the prompt analysis.
     parser.add_argument('--eventfilter', required=False, 
                         help="OCI Compartment OCID (e.g., ocid1.compartment.oc1..aaaaaa...) to fetch audit logs from. This argument is used as the compartment_id.")
 
     # Optional argument
     parser.add_argument('--ociconfig', default=None, help="Optional path to the OCI configuration file (defaults to ~/.oci/config).")
+    parser.add_argument('--parallelism', type=int, default=OciAuditStreamer.MAX_WORKERS,
+                        help=f"Number of date chunks fetched concurrently (defaults to {OciAuditStreamer.MAX_WORKERS}).")
+    parser.add_argument('--eventsfile', default=ALL_EVENTS_FILE,
+                        help=f"Path of the event name frequency file (defaults to {ALL_EVENTS_FILE}).")
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='ndjson',
+                        help="Output format: 'ndjson' writes one compact event per line (default), 'json' a single indented JSON array.")
+    parser.add_argument('--json-array', dest='format', action='store_const', const='json',
+                        help="Same as --format json.")
 
     args = parser.parse_args()
 
@@ -255,7 +550,8 @@ def main():
             profile_name=args.profilename,
             start_date=args.startdate,
             end_date=args.enddate,
-            oci_config_path=args.ociconfig
+            oci_config_path=args.ociconfig,
+            parallelism=args.parallelism
         )
     except SystemExit:
         # Exit silently if OCI initialization failed (error message already printed)
@@ -265,7 +561,7 @@ def main():
     event_generator = streamer.fetch_events_generator()
 
     # 3. Stream results to the JSON file
-    stream_to_json_file(event_generator, args.outputfile,args.eventfilter)
+    stream_to_json_file(event_generator, args.outputfile, args.eventfilter, args.format == 'json', args.eventsfile)
 
 
 if __name__ == '__main__':
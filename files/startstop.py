@@ -1,12 +1,3 @@
-import argparse
-import json
-import time
-from typing import Dict, List, Optional
-
-import oci
-from oci.util import to_dict
-
-
 """startstop.py
 
 Utility to start/stop OCI compute instances and optionally add/remove
@@ -15,10 +6,27 @@ Network Security Groups (NSGs) on the instance primary VNIC.
 This file is intentionally small and uses the OCI Python SDK.
 """
 
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+# The OCI SDK (slow to import) is imported inside the functions that use it,
+# so --list and argument errors do not load it; type checkers still see it
+if TYPE_CHECKING:
+    import oci
+
+
 # Globals / constants
 VERSION = "startstop.py version 16.12.2025"
 COPY_RIGHT = "(c) Inge Os 2025"
-RETRY_COUNT = 5
+# Lifecycle polling: exponential backoff 1, 2, 4, 8, 16, 16, ... seconds, giving up after POLL_MAX_WAIT
+POLL_MAX_INTERVAL = 16
+POLL_MAX_WAIT = 120
+MAX_WORKERS = 16  # instances processed concurrently with --all / --instances
 START = "start"
 STOP = "stop"
 STATUS = "status"
@@ -31,7 +39,58 @@ PROFILE = "profilename"
 TENANCY = "tenancy"
 
 # Required parameters inside the per-instance config entries
-parameter_list = [COMPARTMENT_ID, PROFILE]
+parameter_list: List[str] = [COMPARTMENT_ID, PROFILE]
+
+# OCI clients by (id(config), client class); the config is kept alongside so its id stays unique
+_clients: Dict[Tuple[int, type], Tuple[Dict, object]] = {}
+_clients_lock = threading.Lock()
+
+def get_client(client_class: type, config: Dict):
+    """Return a cached OCI client of ``client_class`` for ``config``.
+
+    All helpers called for one instance share the same client and its
+    HTTPS connection pool. The cache is keyed on the identity of the
+    config dict: every ``process_instance`` call loads its own config,
+    so concurrently processed instances never share a client.
+    """
+    key = (id(config), client_class)
+    with _clients_lock:
+        cached = _clients.get(key)
+        if cached is None or cached[0] is not config:
+            cached = (config, client_class(config))
+            _clients[key] = cached
+    return cached[1]
+
+# Display name -> OCID of all instances / NSGs of a compartment, by
+# (resource kind, tenancy, user, region, compartment). Only used when
+# several instances are processed in one run (see main), so that entries
+# sharing a compartment share one listing instead of one lookup each.
+_use_name_index = False
+_name_indexes: Dict[Tuple, List] = {}
+_name_indexes_lock = threading.Lock()
+
+def _name_index(kind: str, list_method, config: Dict, compartment_ocid: str) -> Dict[str, str]:
+    """Return the cached display name -> OCID map of one compartment.
+
+    The first caller for a compartment pages through ``list_method``;
+    concurrent callers for the same compartment wait for that listing
+    instead of issuing their own. When display names repeat, the first
+    resource listed wins.
+    """
+    import oci
+
+    key = (kind, config.get(TENANCY), config.get("user"), config.get("region"), compartment_ocid)
+    with _name_indexes_lock:
+        entry = _name_indexes.setdefault(key, [threading.Lock(), None])
+    with entry[0]:
+        if entry[1] is None:
+            index = {}
+            for resource in oci.pagination.list_call_get_all_results_generator(
+                list_method, "record", compartment_id=compartment_ocid
+            ):
+                index.setdefault(resource.display_name, resource.id)
+            entry[1] = index
+    return entry[1]
 
 def lookup_instance_ocid_by_name(
     config: Dict, compartment_ocid: str, instance_name: str
@@ -46,15 +105,24 @@ def lookup_instance_ocid_by_name(
     Returns:
         The instance OCID as a string if found; otherwise ``None``.
     """
-    compute_client = oci.core.ComputeClient(config)
+    import oci
 
-    response = oci.pagination.list_call_get_all_results(
-        compute_client.list_instances, compartment_id=compartment_ocid
-    )
+    compute_client = get_client(oci.core.ComputeClient, config)
 
-    for instance in response.data:
-        if instance.display_name == instance_name:
-            return instance.id
+    if _use_name_index:
+        instance_ocid = _name_index(
+            "instance", compute_client.list_instances, config, compartment_ocid
+        ).get(instance_name)
+        if instance_ocid is not None:
+            return instance_ocid
+    else:
+        # Let the service filter on the exact display name; one small response instead of a full scan
+        response = compute_client.list_instances(
+            compartment_id=compartment_ocid, display_name=instance_name, limit=1
+        )
+
+        if response.data:
+            return response.data[0].id
 
     print(
         f"No instance named '{instance_name}' found in compartment {compartment_ocid}"
@@ -74,14 +142,23 @@ def lookup_nsg_ocid_by_name(
     Returns:
         The NSG OCID if found; otherwise ``None``.
     """
-    network = oci.core.VirtualNetworkClient(config)
-    response = oci.pagination.list_call_get_all_results(
-        network.list_network_security_groups, compartment_id=compartment_ocid
-    )
+    import oci
+
+    network = get_client(oci.core.VirtualNetworkClient, config)
+
+    if _use_name_index:
+        nsg_ocid = _name_index(
+            "nsg", network.list_network_security_groups, config, compartment_ocid
+        ).get(nsg_name)
+        if nsg_ocid is not None:
+            return nsg_ocid
+    else:
+        response = network.list_network_security_groups(
+            compartment_id=compartment_ocid, display_name=nsg_name, limit=1
+        )
 
-    for nsg in response.data:
-        if nsg.display_name == nsg_name:
-            return nsg.id
+        if response.data:
+            return response.data[0].id
 
     print(f"No NSG named '{nsg_name}' found in compartment {compartment_ocid}")
     return None
@@ -94,11 +171,9 @@ def list_vnics_of_image(
     The returned value is the raw list of SDK model objects representing
     VNIC attachments.
     """
-    compute_client = oci.core.ComputeClient(oci_config)
-    network_client = oci.core.VirtualNetworkClient(oci_config)
+    import oci
 
-    # Fetch instance details (kept for potential future use)
-    _ = compute_client.get_instance(instance_ocid).data
+    compute_client = get_client(oci.core.ComputeClient, oci_config)
 
     # List all VNIC attachments for this instance (use pagination helper)
     vnic_attachments = (
@@ -113,20 +188,25 @@ def list_vnics_of_image(
     return vnic_attachments
 
 def change_vnic_nsg_association(
-    config: Dict, vnic_ocid: str, nsg_ocid: str, add: bool = True
+    config: Dict, vnic: Union[str, "oci.core.models.Vnic"], nsg_ocid: str, add: bool = True
 ) -> None:
     """Add or remove an NSG OCID from a VNIC's NSG list.
 
     Args:
         config: OCI SDK configuration mapping.
-        vnic_ocid: OCID of the VNIC to update.
+        vnic: OCID of the VNIC to update, or an already fetched VNIC model
+            whose ``nsg_ids`` are used as the current state.
         nsg_ocid: OCID of the NSG to add or remove.
         add: If True add the NSG; if False remove it.
     """
-    network_client = oci.core.VirtualNetworkClient(config)
+    import oci
+
+    network_client = get_client(oci.core.VirtualNetworkClient, config)
 
-    # Get current VNIC state
-    vnic = network_client.get_vnic(vnic_ocid).data
+    # Get current VNIC state unless the caller already has it
+    if isinstance(vnic, str):
+        vnic = network_client.get_vnic(vnic).data
+    vnic_ocid = vnic.id
 
     if add:
         current_nsgs = vnic.nsg_ids or []
@@ -163,7 +243,9 @@ def start_stop_instance(
     :param instance_id: OCID of the instance to start/stop
     :param action: 'start', 'stop'
     """
-    compute = oci.core.ComputeClient(oci_config)
+    import oci
+
+    compute = get_client(oci.core.ComputeClient, oci_config)
     # Determine which action to take
     if action == 'start':
         print(f"Starting instance {instance_id} in compartment {compartment_id}...")
@@ -182,94 +264,39 @@ def start_stop_instance(
 
     # It's typical to wait a bit for state change; poll until not "STARTING" or "STOPPING"
     print("Waiting for state change...")
+    target_state = 'RUNNING' if action == 'start' else 'STOPPED'
     i = 0
-    while i < RETRY_COUNT:
+    waited = 0
+    while True:
         instance = compute.get_instance(instance_id).data
         print(f"  Current state: {instance.lifecycle_state}")
-        if action == 'start' and instance.lifecycle_state == 'RUNNING':
+        if instance.lifecycle_state == target_state or waited >= POLL_MAX_WAIT:
             break
-        if action == 'stop' and instance.lifecycle_state == 'STOPPED':
-            break
-        time.sleep(5)  # Wait before checking again
+        delay = min(POLL_MAX_INTERVAL, 1 << i)
+        time.sleep(delay)  # Wait before checking again, longer each time
+        waited += delay
         i += 1
 
     print(f"Action complete. Instance {instance_id} lifecycle state: {instance.lifecycle_state}")
  
-def main():
-    """Main entry point: parse args, load config and perform requested action."""
-    # Print program header
-    print(VERSION)
-    print(COPY_RIGHT)
-    print()
+def process_instance(instance_config: Dict, action: str) -> int:
+    """Run the requested action for one validated instance config entry.
 
-    # CLI arguments
-    args_parser = argparse.ArgumentParser(
-        description=(
-            "Start/stop a compute instance and optionally add/remove "
-            "an NSG on the primary VNIC"
-        )
-    )
-
-    args_parser.add_argument(
-        "--config-file",
-        required=True,
-        default=None,
-        help="path to instance config file",
-    )
-    args_parser.add_argument(
-        "--action", default="Start", required=False, help="start|stop|status"
-    )
-    args_parser.add_argument(
-        "--instance", required=False, help="Name of instance"
-    )
-    args_parser.add_argument(
-        "--list",
-        required=False,
-        action="store_true",
-        help="List instance names from config file",
-    )
-
-    args = args_parser.parse_args()
+    Loads the OCI config of the entry, resolves the instance (and the
+    optional NSG and primary VNIC) and performs the start/stop/status
+    action. Each call builds its own config and clients, so entries can
+    be processed from different threads.
 
-    # Open and parse the config JSON file
-    try:
-        with open(args.config_file) as fh:
-            config = json.load(fh)
-    except Exception as exc:
-        print(f"Failed to open/parse config file: {exc}")
-        return 1
-
-    # If list flag is set, enumerate instance names and exit
-    if args.list:
-        print("Instances in config file")
-        for entry in config:
-            print(entry.get(INSTANCE_NAME))
-        return 0
-
-    # Determine requested instance and action
-    instance_name = args.instance
-    action = args.action
-    instance_config = None
-
-    # Lookup the instance config entry by name
-    for entry in config:
-        # show entry for debugging
-        # print(entry)
-        if entry.get(INSTANCE_NAME) == instance_name:
-            instance_config = entry
-            break
+    Args:
+        instance_config: Entry from the instance config file.
+        action: 'start', 'stop' or 'status' (any case).
 
-    if instance_config is None:
-        print(f"Instance name {instance_name} not defined in config file {args.config_file}")
-        return 1
+    Returns:
+        0 on success, 1 on failure.
+    """
+    import oci
 
-    # Validate presence of mandatory parameters in the instance config
-    for param in parameter_list:
-        if param not in instance_config:
-            print(f"{param} is not defined in config file {args.config_file}")
-            print(param + ":")
-            print(instance_config)
-            return 1
+    instance_name = instance_config.get(INSTANCE_NAME)
 
     # Fetch OCI profile and optional config location
     oci_config_file = None
@@ -296,6 +323,8 @@ def main():
     instance_id = lookup_instance_ocid_by_name(
         oci_config, compartment_id, instance_name
     )
+    if instance_id is None:
+        return 1
 
     # If an NSG is specified, resolve NSG OCID and primary VNIC
     vnic_id = None
@@ -317,6 +346,8 @@ def main():
             print("No valid VNICs found")
             return 1
 
+        # The VNIC itself is read by change_vnic_nsg_association right before the
+        # update, so a stop changes the NSG list as it is after the instance stopped
         vnic_id = vnics[0].vnic_id
 
     # Execute requested action
@@ -336,11 +367,132 @@ def main():
         # Status currently reuses start_stop_instance which prints lifecycle state
         start_stop_instance(oci_config, instance_id, STATUS, compartment_id)
 
-    else:
+    return 0
+
+def main():
+    """Main entry point: parse args, load config and perform requested action."""
+    global _use_name_index
+
+    # Print program header
+    print(VERSION)
+    print(COPY_RIGHT)
+    print()
+
+    # CLI arguments
+    args_parser = argparse.ArgumentParser(
+        description=(
+            "Start/stop a compute instance and optionally add/remove "
+            "an NSG on the primary VNIC"
+        )
+    )
+
+    args_parser.add_argument(
+        "--config-file",
+        required=True,
+        default=None,
+        help="path to instance config file",
+    )
+    args_parser.add_argument(
+        "--action", default="Start", required=False, help="start|stop|status"
+    )
+    args_parser.add_argument(
+        "--instance", required=False, help="Name of instance"
+    )
+    args_parser.add_argument(
+        "--instances",
+        required=False,
+        help="Comma separated instance names, processed concurrently",
+    )
+    args_parser.add_argument(
+        "--all",
+        required=False,
+        action="store_true",
+        help="Process all instances in the config file concurrently",
+    )
+    args_parser.add_argument(
+        "--list",
+        required=False,
+        action="store_true",
+        help="List instance names from config file",
+    )
+
+    args = args_parser.parse_args()
+
+    # Open and parse the config JSON file
+    try:
+        with open(args.config_file) as fh:
+            config = json.load(fh)
+    except Exception as exc:
+        print(f"Failed to open/parse config file: {exc}")
+        return 1
+
+    # If list flag is set, enumerate instance names and exit
+    if args.list:
+        print("Instances in config file")
+        for entry in config:
+            print(entry.get(INSTANCE_NAME))
+        return 0
+
+    # Determine requested action and instances
+    action = args.action
+    if action.lower() not in (START, STOP, STATUS):
         print("Action must be start|stop|status")
         args_parser.print_help()
+        return 1
+
+    if args.all:
+        instance_configs = list(config)
+    else:
+        if args.instances:
+            instance_names = [n.strip() for n in args.instances.split(",") if n.strip()]
+        else:
+            instance_names = [args.instance]
+
+        # Lookup the instance config entries by name
+        entries = {}
+        for entry in config:
+            entries.setdefault(entry.get(INSTANCE_NAME), entry)
+        instance_configs = []
+        for instance_name in instance_names:
+            if instance_name not in entries:
+                print(f"Instance name {instance_name} not defined in config file {args.config_file}")
+                return 1
+            instance_configs.append(entries[instance_name])
+
+    # Validate presence of mandatory parameters in the instance configs
+    for instance_config in instance_configs:
+        for param in parameter_list:
+            if param not in instance_config:
+                print(f"{param} is not defined in config file {args.config_file}")
+                print(param + ":")
+                print(instance_config)
+                return 1
+
+    if len(instance_configs) == 1:
+        return process_instance(instance_configs[0], action)
+
+    # Several instances: each one is network bound, so run them concurrently,
+    # resolving names from one listing per compartment
+    _use_name_index = True
+    failed = 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(process_instance, instance_config, action): instance_config.get(INSTANCE_NAME)
+            for instance_config in instance_configs
+        }
+        for future in as_completed(futures):
+            instance_name = futures[future]
+            try:
+                rc = future.result()
+            except Exception as exc:
+                print(f"Instance {instance_name}: failed: {exc}")
+                rc = 1
+            else:
+                print(f"Instance {instance_name}: {'done' if rc == 0 else 'failed'}")
+            failed += rc != 0
+
+    return 1 if failed else 0
 
 
 if __name__ == '__main__':
-    main()
-    
\ No newline at end of file
+    sys.exit(main())
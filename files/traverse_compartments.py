@@ -1,94 +1,369 @@
-import oci
+"""traverse_compartments.py
+
+Prints all active compartments of the tenancy: the tenancy itself followed by every
+compartment below it, fetched with one paginated list_compartments call.
+
+The helpers can also be imported. For per-compartment work, use map_compartments
+instead of a serial loop, so the API calls run concurrently:
+
+    identity_client = oci.identity.IdentityClient(config)
+    compartments = list_subtree_compartments(identity_client, config["tenancy"])
+    for compartment, result in map_compartments(compartments, list_instances_of):
+        if isinstance(result, Exception):
+            print(f"{compartment.name}: {result}")
+"""
+
 import os
+import sys
 import argparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import copy
+import hashlib
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# OCI SDK modules and the retry policies built on them, set by _import_oci() before the
+# first API call so that --help and argument errors skip the (slow) SDK import. A cached
+# print_compartment_tree() call from code importing this module skips it as well; the
+# command line still imports it to read the config file.
+oci = None
+requests = None
+HTTP_RETRY = None
+RETRY_STRATEGY = None
+
+# orjson is optional; without it the compartment cache is read and written with json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# One active compartment of the listing
+Compartment = namedtuple('Compartment', ['name', 'ocid'])
+# Output row of a compartment; a Compartment tuple is formatted with it directly (ROW % compartment)
+ROW = "Name: %s\nOCID: %s\n\n"
+# Rows collected from the listing before they are written out
+WRITE_BATCH_ROWS = 256
+# Default number of concurrent per-compartment calls in map_compartments
+MAP_WORKERS = 16
+
+# On-disk cache of compartment subtrees, one file per root compartment
+CACHE_DIR = os.path.expanduser(os.path.join('~', '.oci', 'compartment_cache'))
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# HTTPS connection pool of the identity client. HTTP_RETRY retries failed connections
+# (3 times, 0.2s backoff); throttled (429) and failed (5xx) responses are retried by RETRY_STRATEGY.
+POOL_SIZE = 32
+
+def _import_oci():
+    """Imports the OCI SDK into the module globals and builds HTTP_RETRY and RETRY_STRATEGY."""
+    global oci, requests, HTTP_RETRY, RETRY_STRATEGY
+    if oci is not None:
+        return
+    import oci
+    from oci._vendor import requests  # the requests copy the OCI SDK clients are built on
+    from urllib3.util.retry import Retry
+    HTTP_RETRY = Retry(total=3, backoff_factor=0.2)
+    # Passed explicitly to every API call, so retries do not depend on the SDK version's default
+    RETRY_STRATEGY = _make_retry_strategy()
+
+def _make_retry_strategy():
+    """
+    Returns a copy of the SDK default retry strategy (exponential backoff with jitter on
+    429, 5xx and timeouts, up to 8 attempts) that reports each retry on stderr.
+    """
+    strategy = copy.copy(oci.retry.DEFAULT_RETRY_STRATEGY)
+    do_sleep = strategy.do_sleep
+
+    def logged_sleep(attempt, exception):
+        print(f"Retrying API call (attempt {attempt}) after {getattr(exception, 'status', '')} "
+              f"{getattr(exception, 'code', type(exception).__name__)}", file=sys.stderr)
+        do_sleep(attempt, exception)
+
+    strategy.do_sleep = logged_sleep
+    return strategy
 
-def get_compartment_tree(config, compartment_id, all_compartments=None):
+def _make_session(pool_size=POOL_SIZE):
     """
-    Recursively fetches all compartments within a given compartment and its sub-compartments.
-    
+    Creates a requests.Session with a larger connection pool and HTTP_RETRY. Keeps the
+    SDK's own HTTPS adapter when available.
+    """
+    adapter_class = getattr(oci.base_client, 'OCIHTTPAdapter', requests.adapters.HTTPAdapter)
+    session = requests.Session()
+    session.mount('https://', adapter_class(pool_connections=pool_size, pool_maxsize=pool_size,
+                                            max_retries=HTTP_RETRY))
+    return session
+
+def iter_subtree_compartments(identity_client, root_id):
+    """
+    Yields the active compartments within a given compartment and its sub-compartments
+    as Compartment (name, ocid) tuples, page by page as the responses arrive.
+
+    No recursion is needed: with compartment_id_in_subtree=True the identity API
+    flattens the whole subtree server side. A single call returns one page only, so
+    the next page tokens are followed here. The pages are requested directly rather than
+    through the SDK paginator, which wraps each call in its own default retry strategy;
+    this way only RETRY_STRATEGY retries them. ServiceError is raised to the caller.
+
     Args:
-        config (dict): OCI SDK configuration dictionary.
-        compartment_id (str): The OCID of the parent compartment to start the traversal from.
-        all_compartments (list, optional): A list to store all discovered compartments.
-                                          Defaults to None, and a new list is created.
-    
-    Returns:
-        list: A flat list of dictionaries, where each dictionary represents a compartment
-              with its name and OCID.
+        identity_client (oci.identity.IdentityClient): Client used for the lookup.
+        root_id (str): The OCID of the parent compartment to start the traversal from.
     """
-    if all_compartments is None:
-        all_compartments = []
+    _import_oci()
+    page = None
+    while True:
+        response = identity_client.list_compartments(
+            compartment_id=root_id,
+            compartment_id_in_subtree=True,
+            lifecycle_state="ACTIVE",
+            page=page,
+            retry_strategy=RETRY_STRATEGY
+        )
+        for c in response.data:
+            yield Compartment(c.name, c.id)
+        if not response.has_next_page:
+            break
+        page = response.next_page
 
-    identity_client = oci.identity.IdentityClient(config)
-    
-    # List all compartments within the specified parent compartment
+def list_subtree_compartments(identity_client, root_id):
+    """
+    Fetches all compartments within a given compartment and its sub-compartments.
+
+    The result is a flat list, not a tree: the identity API walks the subtree server
+    side (compartment_id_in_subtree=True), so whether it is traversed breadth or depth
+    first is not a choice made here. Walking it client side, one list_compartments call
+    per child, would only add round trips.
+
+    Args:
+        identity_client (oci.identity.IdentityClient): Client used for the lookup.
+        root_id (str): The OCID of the parent compartment to start the traversal from.
+
+    Returns:
+        list: A flat list of Compartment (name, ocid) tuples, empty if the listing failed.
+    """
+    _import_oci()
     try:
-        list_compartments_response = identity_client.list_compartments(
-            compartment_id=compartment_id,
-            compartment_id_in_subtree=True
-        )
-        compartments = list_compartments_response.data
-        
-        for compartment in compartments:
-            if compartment.lifecycle_state == 'ACTIVE':
-                all_compartments.append({
-                    'name': compartment.name,
-                    'ocid': compartment.id
-                })
-                
+        return list(iter_subtree_compartments(identity_client, root_id))
     except oci.exceptions.ServiceError as e:
-        print(f"Error listing compartments for {compartment_id}: {e}")
+        print(f"Error listing compartments for {root_id}: {e}")
         return []
-    
-    return all_compartments
 
-def print_compartment_tree(config, root_compartment_id):
+def map_compartments(compartments, fn, max_workers=MAP_WORKERS):
+    """
+    Calls fn(compartment) for every compartment on a bounded thread pool, so per-compartment
+    API calls (list instances, buckets, ...) overlap instead of running one after another.
+
+    Args:
+        compartments (iterable): Compartment tuples, e.g. from list_subtree_compartments.
+        fn (callable): Function taking one Compartment. It runs in a worker thread.
+        max_workers (int): Maximum number of concurrent calls.
+
+    Returns:
+        list: (compartment, result) tuples in input order. If fn raised, the exception
+              is returned as the result so one failing compartment does not stop the rest.
+    """
+    def call(compartment):
+        try:
+            return compartment, fn(compartment)
+        except Exception as e:
+            return compartment, e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(call, compartments))
+
+def _get_root(identity_client, root_id, tenancy_id):
+    """
+    Returns the root of the listing as a Compartment, or None if it is not active.
+    The tenancy (root compartment) is read with get_tenancy, which has no lifecycle state.
+    """
+    if root_id == tenancy_id:
+        tenancy = identity_client.get_tenancy(tenancy_id=root_id, retry_strategy=RETRY_STRATEGY).data
+        return Compartment(tenancy.name, tenancy.id)
+    root_compartment = identity_client.get_compartment(compartment_id=root_id, retry_strategy=RETRY_STRATEGY).data
+    if root_compartment.lifecycle_state == 'ACTIVE':
+        return Compartment(root_compartment.name, root_compartment.id)
+    return None
+
+def _cache_path(root_id):
+    """Returns the cache file of a compartment subtree; the root OCID is hashed into the name."""
+    digest = hashlib.sha256(root_id.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+def _load_cache(root_id):
+    """
+    Returns the cached (root, compartments) of a subtree as Compartment tuples, root being
+    None if it is not active. Returns None if there is no cache file, it is older than
+    CACHE_TTL_SECONDS or it cannot be read.
+    """
+    path = _cache_path(root_id)
+    try:
+        if time.time() - os.path.getmtime(path) >= CACHE_TTL_SECONDS:
+            return None
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        root = Compartment(**data['root']) if data['root'] is not None else None
+        return root, [Compartment(**c) for c in data['compartments']]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _save_cache(root_id, root, compartments):
+    """Writes the subtree cache atomically, via a temp file that is renamed over it."""
+    path = _cache_path(root_id)
+    data = {
+        'root': root._asdict() if root is not None else None,
+        'compartments': [c._asdict() for c in compartments],
+    }
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(data) if orjson is not None else json.dumps(data).encode('utf-8'))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write compartment cache {path}: {e}")
+
+def _write_rows(rows):
+    """Writes compartments to stdout, formatted once and written with a single call."""
+    if rows:
+        sys.stdout.write("".join([ROW % c for c in rows]))
+
+def _make_principal_client(auth):
+    """
+    Creates an IdentityClient authenticated by an instance or resource principal signer,
+    skipping the config file and API key. Returns (config, identity_client), the config
+    holding the region and tenancy of the signer.
+    """
+    _import_oci()
+    if auth == 'instance_principal':
+        signer = oci.auth.signers.InstancePrincipalsSecurityTokenSigner()
+    else:
+        signer = oci.auth.signers.get_resource_principals_signer()
+    config = {'region': signer.region, 'tenancy': signer.tenancy_id}
+    identity_client = oci.identity.IdentityClient(config, signer=signer)
+    identity_client.base_client.session = _make_session()
+    return config, identity_client
+
+def print_compartment_tree(config, root_compartment_id, use_cache=True, refresh_cache=False, identity_client=None,
+                           include_root=True):
     """
     Prints a list of all active compartments in a given compartment subtree, 
     including the root compartment itself, with their OCIDs and names.
 
+    The result is cached on disk for CACHE_TTL_SECONDS, so repeated runs make no API calls.
+
     Args:
         config (dict): OCI SDK configuration dictionary.
         root_compartment_id (str): The OCID of the root compartment to start the traversal.
+        use_cache (bool): Read and write the on-disk cache. False bypasses it completely.
+        refresh_cache (bool): Ignore a cached result, fetch from the API and rewrite the cache.
+        identity_client (oci.identity.IdentityClient, optional): Client to reuse. By default one
+            client is created, and only when the API has to be called.
+        include_root (bool): Print the root compartment first. False skips the root lookup;
+            the cache is then only read, as a fetched result would lack the root.
     """
-    
-    # Fetch the root compartment information
-    try:
-        identity_client = oci.identity.IdentityClient(config)
-        root_compartment = identity_client.get_compartment(compartment_id=root_compartment_id).data
-        if root_compartment.lifecycle_state == 'ACTIVE':
-            print(f"Name: {root_compartment.name}\nOCID: {root_compartment.id}\n")
-    except oci.exceptions.ServiceError as e:
-        print(f"Error fetching root compartment {root_compartment_id}: {e}")
+    cached = _load_cache(root_compartment_id) if use_cache and not refresh_cache else None
+
+    if cached is not None:
+        # Format everything once and write it with a single call instead of one print() per compartment
+        root, compartments = cached
+        _write_rows(compartments if root is None or not include_root else [root] + compartments)
         return
 
-    compartments_to_traverse = get_compartment_tree(config, root_compartment_id)
-    
-    for compartment in compartments_to_traverse:
-        print(f"Name: {compartment['name']}\nOCID: {compartment['ocid']}\n")
+    # One client for the root lookup and the subtree listing
+    _import_oci()
+    if identity_client is None:
+        identity_client = oci.identity.IdentityClient(config)
+        identity_client.base_client.session = _make_session()
+
+    # The root lookup runs in the background while the subtree pages are listed; the pages
+    # themselves cannot be fetched in parallel, each page token comes from the previous
+    # response. Rows are written every WRITE_BATCH_ROWS compartments as they arrive.
+    compartments = []
+    written = 0
+    root_pending = include_root
+    listed = True
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        if include_root:
+            root_future = executor.submit(_get_root, identity_client, root_compartment_id, config.get("tenancy"))
+        listing = iter_subtree_compartments(identity_client, root_compartment_id)
+        while True:
+            try:
+                compartment = next(listing, None)
+            except oci.exceptions.ServiceError as e:
+                print(f"Error listing compartments for {root_compartment_id}: {e}")
+                compartment = None
+                listed = False
+            if compartment is not None:
+                compartments.append(compartment)
+                if len(compartments) - written < WRITE_BATCH_ROWS:
+                    continue
+
+            # The root is written first, so wait for its lookup before the first batch
+            if root_pending:
+                try:
+                    root = root_future.result()
+                except oci.exceptions.ServiceError as e:
+                    print(f"Error fetching root compartment {root_compartment_id}: {e}")
+                    return
+                root_pending = False
+                if root is not None:
+                    _write_rows([root])
+
+            _write_rows(compartments[written:])
+            written = len(compartments)
+            if compartment is None:
+                break
+    sys.stdout.flush()
+
+    # A failed listing is incomplete and is not cached
+    if use_cache and listed and include_root:
+        _save_cache(root_compartment_id, root, compartments)
 
 if __name__ == '__main__':
     # Load the default OCI config
     parser = argparse.ArgumentParser(description='Recursively print OCI compartment tree.')
     parser.add_argument('--profile', type=str, default='DEFAULT', help='The OCI config file profile to use.')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write the compartment cache in ~/.oci/compartment_cache.')
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help='Ignore the cached compartment list, fetch it again and update the cache.')
+    parser.add_argument('--no-root', action='store_true',
+                        help='Do not print the root compartment (tenancy), only the compartments below it.')
+    parser.add_argument('--auth', choices=('config', 'instance_principal', 'resource_principal'),
+                        default='resource_principal' if os.environ.get('OCI_RESOURCE_PRINCIPAL_VERSION') else 'config',
+                        help='Authenticate with the config file profile (default), as the OCI compute instance '
+                             '(instance_principal) or as the resource running the script (resource_principal, '
+                             'the default when OCI_RESOURCE_PRINCIPAL_VERSION is set).')
     args = parser.parse_args()
+    _import_oci()
 
-    # Load the OCI config using the specified profile
-    try:
-        config = oci.config.from_file(os.environ.get('OCI_CONFIG_FILE', '~/.oci/config'), args.profile)
-    except oci.exceptions.ConfigFileNotFound:
-        print("OCI config file not found. Please ensure it is located at ~/.oci/config or specified by the OCI_CONFIG_FILE environment variable.")
-        exit()
-    except Exception as e:
-        print(f"An error occurred loading the OCI config: {e}")
-        exit()
+    identity_client = None
+    if args.auth == 'config':
+        # Load the OCI config using the specified profile; from_file is given an expanded path
+        config_file = os.path.expanduser(os.environ.get('OCI_CONFIG_FILE', '~/.oci/config'))
+        try:
+            config = oci.config.from_file(config_file, args.profile)
+        except oci.exceptions.ConfigFileNotFound:
+            print("OCI config file not found. Please ensure it is located at ~/.oci/config or specified by the OCI_CONFIG_FILE environment variable.")
+            sys.exit(1)
+        except (oci.exceptions.ProfileNotFound, oci.exceptions.InvalidConfig,
+                oci.exceptions.InvalidKeyFilePath, ValueError) as e:
+            print(f"An error occurred loading the OCI config: {e}")
+            sys.exit(1)
+    else:
+        # No config file or API key: the signer supplies the region and tenancy
+        try:
+            config, identity_client = _make_principal_client(args.auth)
+        except Exception as e:
+            print(f"Could not authenticate with {args.auth}: {e}")
+            sys.exit(1)
 
     # Get the tenancy OCID from the config
     tenancy_id = config.get("tenancy")
     if not tenancy_id:
         print("Tenancy OCID not found in the OCI config.")
-        exit()
-
-    print_compartment_tree(config, tenancy_id)
+        sys.exit(1)
 
+    print_compartment_tree(config, tenancy_id, use_cache=not args.no_cache, refresh_cache=args.refresh_cache,
+                           identity_client=identity_client, include_root=not args.no_root)